@@ -1,16 +1,34 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
+import http.client
 import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
 import sys
+import threading
 import time
-import urllib.request
-import urllib.error
-import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
-from datetime import datetime
 from typing import List, Dict, Optional
 
+try:
+    from yt_dlp import YoutubeDL
+except ImportError:
+    print("[ERROR] yt-dlp is required: pip install yt-dlp", file=sys.stderr)
+    sys.exit(1)
+
+try:
+    import orjson  # ~3-10x faster (de)serialization when available
+except ImportError:
+    orjson = None
+
 # ---------- Paths ----------
 ROOT = Path(__file__).resolve().parents[1]
 CATALOG = ROOT / "catalog"
@@ -19,45 +37,207 @@ PLAYLISTS_DIR = CATALOG / "playlists"
 SHORTS_DIR = CATALOG / "shorts"
 PLAYLIST_META_DIR = CATALOG / "playlist_meta"
 PLAYLIST_ITEMS_DIR = CATALOG / "playlist_items"
+CACHE_DIR = ROOT / ".cache" / "catalog"
+
+# ---------- URL templates ----------
+WATCH_URL_PREFIX = "https://www.youtube.com/watch?v="
+PLAYLIST_URL_PREFIX = "https://www.youtube.com/playlist?list="
+# video thumbs are deterministic; no need to parse the thumbnails array
+VIDEO_THUMB_SUFFIX = "/hqdefault.jpg"
+VIDEO_THUMB_PREFIX = "https://i.ytimg.com/vi/"
 
 # ---------- Tuning ----------
 TIMEOUT_SEC = 20          # default per-command timeout
 MAX_ITEMS_PER_LIST = 80   # max items pulled from channel pages
 MAX_ITEMS_PER_PLAYLIST = 500  # max videos per playlist when dumping items
+MAX_WORKERS = 8           # upper bound on concurrent yt-dlp fetches
+CACHE_TTL_LISTS = 24 * 3600       # avatars + channel listings
+CACHE_TTL_META = 7 * 24 * 3600    # playlist meta (rarely changes)
+CACHE_TTL_ITEMS = 24 * 3600       # playlist item dumps
+
+# FAST_META=1: accept a missing thumbnail instead of paying the slow
+# yt-dlp fallback when oEmbed comes back empty (bulk generation mode).
+FAST_META = os.environ.get("FAST_META") == "1"
+
+# ---------- Logging ----------
+#
+# Workers log through an in-memory queue so hot loops never block on the
+# stream lock or a flush; a single listener thread drains to stderr.
+
+log = logging.getLogger("genc")
+
+def _setup_logging() -> logging.handlers.QueueListener:
+    q: "queue.SimpleQueue" = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(q, handler)
+    log.addHandler(logging.handlers.QueueHandler(q))
+    log.setLevel(logging.INFO)
+    listener.start()
+    return listener
 
 # ---------- Small helpers ----------
 
-def _run_json(cmd: List[str], timeout_sec: int = TIMEOUT_SEC) -> Dict:
-    p = subprocess.run(cmd, text=True, capture_output=True, timeout=timeout_sec)
-    if p.returncode != 0:
-        raise RuntimeError(p.stderr.strip() or p.stdout.strip())
-    return json.loads(p.stdout)
+# Base options shared by every extraction; equivalent to the old
+# `yt-dlp -J --no-warnings` subprocess invocations. lazy_playlist lets
+# listings stop as soon as playlistend is reached, and pinning the web
+# player client skips probing the other clients — both shave time off
+# every call at the cost of matching only what the web client exposes.
+# (--no-config has no in-process equivalent: YoutubeDL never reads
+# config files. TLS verification is deliberately left on.)
+_YDL_OPTS = {
+    "quiet": True,
+    "no_warnings": True,
+    "skip_download": True,
+    "socket_timeout": TIMEOUT_SEC,
+    "lazy_playlist": True,
+    # shared cache for compiled signature/nsig JS, next to our own cache
+    # (the in-process instances already amortize it within a run)
+    "cachedir": str(ROOT / ".cache" / "ytdlp"),
+    # we never download, so skip format probing/validation outright
+    "check_formats": False,
+    "ignore_no_formats_error": True,
+    "extractor_args": {
+        "youtube": {
+            "player_client": ["web"],
+            "skip": ["hls", "dash", "translated_subs"],
+        },
+        # tab listings are served entirely from the initial JSON payload;
+        # skipping the webpage fetch drops a secondary HTML request per
+        # channel/playlist scrape
+        "youtubetab": {
+            "skip": ["webpage"],
+        },
+    },
+}
+
+_tls = threading.local()
+
+# Global cap on in-flight extractions, so the total stays bounded even
+# when several pools (e.g. the meta batch sweep) are active at once.
+_extract_sem = threading.BoundedSemaphore(MAX_WORKERS)
+
+def _extract(url: str, **overrides) -> Dict:
+    """
+    In-process replacement for `yt-dlp -J <url>`: returns the info dict
+    directly, skipping fork/exec, interpreter startup and the JSON
+    round-trip through stdout. One YoutubeDL per (thread, options) pair
+    amortizes extractor registration and is safe under the thread pool.
+    """
+    opts = dict(_YDL_OPTS, **overrides)
+    # repr() keeps the key hashable even for dict-valued options
+    key = tuple((k, repr(v)) for k, v in sorted(opts.items()))
+    ydls = getattr(_tls, "ydls", None)
+    if ydls is None:
+        ydls = _tls.ydls = {}
+    ydl = ydls.get(key)
+    if ydl is None:
+        ydl = ydls[key] = YoutubeDL(opts)
+    with _extract_sem:
+        info = ydl.extract_info(url, download=False)
+    if not isinstance(info, dict):
+        raise RuntimeError(f"empty extraction result for {url}")
+    return info
+
+# ---------- Disk cache ----------
+#
+# Most channels/playlists don't change between runs, so successful fetch
+# results are kept under .cache/catalog with a TTL. Failures (None/empty)
+# are never cached, so transient errors retry on the next run.
+
+_cache_disabled = False
+
+def _cache_get(key: str, ttl_sec: int):
+    if _cache_disabled:
+        return None
+    path = CACHE_DIR / f"{key}.json"
+    try:
+        # Freshness comes from the file mtime: stale entries cost one
+        # stat() instead of an open+parse.
+        if time.time() - path.stat().st_mtime > ttl_sec:
+            return None
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def _cache_put(key: str, payload):
+    if payload:
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            path = CACHE_DIR / f"{key}.json"
+            tmp = path.with_suffix(".json.tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            tmp.replace(path)
+        except Exception as ex:
+            log.info(f"[CACHE] put {key} failed: {ex}")
+    return payload
+
+def _cache_evict(entry_id: str) -> None:
+    """Drop every cache entry for a channel/playlist id (--refresh)."""
+    for p in CACHE_DIR.glob(f"*_{entry_id}.json"):
+        try:
+            p.unlink()
+            log.info(f"[CACHE] evicted {p.name}")
+        except OSError:
+            pass
+
+def _now_z() -> str:
+    """UTC run/file timestamp; strftime is cheaper than isoformat and
+    second resolution keeps identical payloads byte-identical."""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
 def _pick_thumb_from_list(thumbs) -> Optional[str]:
-    if not isinstance(thumbs, list) or not thumbs:
+    # Hot path: runs once per entry per listing, so keep it allocation-free
+    # (no `(t or {})` temporaries, exact type check instead of isinstance).
+    if type(thumbs) is not list or not thumbs:
         return None
-    # imame paskutinę/„geriausią“ jei sąrašas didėjančios kokybės
-    for t in reversed(thumbs):
-        u = (t or {}).get("url")
+    # imame paskutinę/„geriausią“ jei sąrašas didėjančios kokybės;
+    # yt-dlp's last entry is virtually always well-formed, so try it
+    # before paying for the reversed() scan
+    last = thumbs[-1]
+    if last:
+        u = last.get("url")
         if u:
             return u
+    for t in reversed(thumbs):
+        if t:
+            u = t.get("url")
+            if u:
+                return u
     return None
 
-def _pick_thumb_any(obj: Dict, keys: List[str]) -> Optional[str]:
+# Hoisted so call sites don't rebuild a list per call.
+_AVATAR_KEYS = ("channel_thumbnails", "thumbnails")
+_UPLOADER_KEYS = ("uploader_thumbnails", "thumbnails")
+
+def _pick_thumb_any(obj: Dict, keys: tuple) -> Optional[str]:
     for k in keys:
         u = _pick_thumb_from_list(obj.get(k))
         if u:
             return u
     return None
 
+_PL_RE = re.compile(r"[?&]list=([A-Za-z0-9_-]+)")
+
+def _extract_pl_id(it: Dict) -> Optional[str]:
+    """Playlist id of a videos.json entry: `id` when set, otherwise parsed
+    out of the URL (robust to query-parameter order)."""
+    idv = str(it.get("id") or "").strip()
+    if idv:
+        return idv
+    m = _PL_RE.search(str(it.get("url") or ""))
+    return m.group(1) if m else None
+
 def load_videos() -> List[Dict]:
     if not VIDEOS_JSON.exists():
-        print(f"[ERROR] Missing {VIDEOS_JSON}", file=sys.stderr)
+        log.error(f"[ERROR] Missing {VIDEOS_JSON}")
         sys.exit(1)
-    with VIDEOS_JSON.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+    raw = VIDEOS_JSON.read_bytes()
+    data = orjson.loads(raw) if orjson else json.loads(raw)
     items = data.get("items", [])
-    print(f"[INFO] Loaded videos.json with {len(items)} items")
+    log.info(f"[INFO] Loaded videos.json with {len(items)} items")
     return items
 
 def ensure_dirs() -> None:
@@ -66,130 +246,240 @@ def ensure_dirs() -> None:
     PLAYLIST_META_DIR.mkdir(parents=True, exist_ok=True)
     PLAYLIST_ITEMS_DIR.mkdir(parents=True, exist_ok=True)
 
-def write_json(path: Path, obj: Dict) -> None:
+# Outputs stay pretty-printed by default: they're served from git and
+# reviewed in diffs. --compact halves the bytes when that doesn't matter.
+_compact = False
+
+def _encode_stdlib(obj: Dict) -> bytes:
+    if _compact:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+# Without orjson, encoding a 500-item playlist dump is the one real CPU
+# burn in the script and it holds the GIL against the fetch threads.
+# Ship those encodes to a small process pool; small payloads aren't
+# worth the pickle round trip.
+_encode_pool: Optional[ProcessPoolExecutor] = None
+_ENCODE_OFFLOAD_MIN_ITEMS = 200
+
+def _dump_json(obj: Dict) -> bytes:
+    if orjson is not None:
+        opt = orjson.OPT_NON_STR_KEYS
+        if not _compact:
+            opt |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=opt)
+    items = obj.get("items")
+    if isinstance(items, list) and len(items) >= _ENCODE_OFFLOAD_MIN_ITEMS:
+        global _encode_pool
+        if _encode_pool is None:
+            _encode_pool = ProcessPoolExecutor(max_workers=2)
+        return _encode_pool.submit(_encode_stdlib, obj).result()
+    return _encode_stdlib(obj)
+
+def _same_content(path: Path, obj: Dict) -> bool:
+    """True when the file already holds obj, ignoring generatedAt churn."""
+    try:
+        raw = path.read_bytes()
+        old = orjson.loads(raw) if orjson else json.loads(raw)
+    except Exception:
+        return False
+    if not isinstance(old, dict):
+        return False
+    if "generatedAt" in old or "generatedAt" in obj:
+        old = dict(old, generatedAt=None)
+        obj = dict(obj, generatedAt=None)
+    return old == obj
+
+def write_json(path: Path, obj: Dict, atomic: bool = True) -> bool:
+    """
+    Returns True when bytes actually hit the disk. atomic=False skips
+    the tmp-file + rename dance; fine for derived outputs
+    (playlist_items) that the next run would regenerate anyway.
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
+    # Unchanged content (modulo timestamp) keeps its old bytes, so git
+    # and anything downstream see no churn on no-op runs.
+    if path.exists() and _same_content(path, obj):
+        log.info(f"[SKIP] unchanged {path}")
+        return False
+    if not atomic:
+        path.write_bytes(_dump_json(obj))
+        return True
     tmp = path.with_suffix(".json.tmp")
-    with tmp.open("w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+    tmp.write_bytes(_dump_json(obj))
     tmp.replace(path)
+    return True
 
 # ---------- Collectors (NO official API) ----------
 
+@lru_cache(maxsize=None)
 def fetch_channel_avatar(channel_id: str) -> Optional[str]:
     """
-    Get channel avatar without the official API by probing:
-      1) /about → channel_thumbnails or thumbnails
-      2) /videos (first item) → uploader_thumbnails
+    Get channel avatar without the official API: one flat probe of the
+    channel root, which carries both channel_thumbnails and the first
+    entry's uploader_thumbnails (the two sources probed separately
+    before).
     """
-    print(f"[AVATAR] {channel_id} …", flush=True)
-
-    # 1) /about
-    try:
-        j = _run_json(["yt-dlp", "-J", f"https://www.youtube.com/channel/{channel_id}/about"])
-        avatar = _pick_thumb_any(j, ["channel_thumbnails", "thumbnails"])
-        if avatar:
-            print(f"[AVATAR] ok via /about", flush=True)
-            return avatar
-    except Exception as ex:
-        print(f"[AVATAR] /about failed: {ex}", flush=True)
+    cached = _cache_get(f"avatar_{channel_id}", CACHE_TTL_LISTS)
+    if cached:
+        log.info(f"[AVATAR] {channel_id} cached")
+        return cached
 
-    # 2) /videos first item
+    log.info(f"[AVATAR] {channel_id} …")
     try:
-        j = _run_json([
-            "yt-dlp", "-J", "--playlist-items", "1",
-            f"https://www.youtube.com/channel/{channel_id}/videos"
-        ])
-        avatar = _pick_thumb_any(j, ["channel_thumbnails", "thumbnails"])
+        j = _extract(
+            f"https://www.youtube.com/channel/{channel_id}",
+            extract_flat=True, playlist_items="1",
+        )
+        avatar = _pick_thumb_any(j, _AVATAR_KEYS)
         if not avatar:
             entries = j.get("entries") or []
             if entries:
-                avatar = _pick_thumb_any(entries[0] or {}, ["uploader_thumbnails"])
+                avatar = _pick_thumb_any(entries[0] or {}, _UPLOADER_KEYS)
         if avatar:
-            print(f"[AVATAR] ok via /videos first entry", flush=True)
-            return avatar
+            log.info(f"[AVATAR] ok via channel root")
+            return _cache_put(f"avatar_{channel_id}", avatar)
     except Exception as ex:
-        print(f"[AVATAR] /videos first failed: {ex}", flush=True)
+        log.info(f"[AVATAR] probe failed: {ex}")
 
-    print(f"[AVATAR] fallback: none", flush=True)
+    log.info(f"[AVATAR] fallback: none")
     return None
 
+def _harvest_avatar(channel_id: str, j: Dict) -> None:
+    """
+    Channel tab listings carry the same thumbnails the avatar probe asks
+    for; stash them on cold listings so fetch_channel_avatar becomes a
+    cache hit instead of its own extraction.
+    """
+    if _cache_get(f"avatar_{channel_id}", CACHE_TTL_LISTS):
+        return
+    avatar = _pick_thumb_any(j, _AVATAR_KEYS)
+    if not avatar:
+        entries = j.get("entries") or []
+        if entries:
+            avatar = _pick_thumb_any(entries[0] or {}, _UPLOADER_KEYS)
+    if avatar:
+        _cache_put(f"avatar_{channel_id}", avatar)
+
 def collect_playlists(channel_id: str) -> List[Dict]:
+    cached = _cache_get(f"playlists_{channel_id}", CACHE_TTL_LISTS)
+    if cached is not None:
+        log.info(f"[LIST] playlists {channel_id}: {len(cached)} items (cached)")
+        return cached
+
     url = f"https://www.youtube.com/channel/{channel_id}/playlists"
-    print(f"[LIST] playlists {channel_id} …", flush=True)
+    log.info(f"[LIST] playlists {channel_id} …")
     try:
-        j = _run_json([
-            "yt-dlp", "--flat-playlist", "-J",
-            "--playlist-end", str(MAX_ITEMS_PER_LIST),
-            url
-        ])
+        j = _extract(url, extract_flat=True, playlist_items=f"1:{MAX_ITEMS_PER_LIST}")
+        _harvest_avatar(channel_id, j)
         out: List[Dict] = []
+        append = out.append  # hoisted out of the per-entry loop
         for e in (j.get("entries") or []):
-            eid = (e or {}).get("id") or ""
+            if not e:
+                continue
+            eid = e.get("id") or ""
             if not eid.startswith("PL"):
                 continue
-            title = (e or {}).get("title") or ""
-            thumb = _pick_thumb_from_list((e or {}).get("thumbnails"))
-            out.append({
+            title = e.get("title") or ""
+            thumb = _pick_thumb_from_list(e.get("thumbnails"))
+            append({
                 "id": eid,
                 "title": title,
-                "url": f"https://www.youtube.com/playlist?list={eid}",
+                "url": PLAYLIST_URL_PREFIX + eid,
                 "thumbnail": thumb,
                 "type": "youtube_playlist",
                 "categories": [],
                 "lang": None
             })
-        print(f"[LIST] playlists {channel_id}: {len(out)} items", flush=True)
-        return out
+        log.info(f"[LIST] playlists {channel_id}: {len(out)} items")
+        return _cache_put(f"playlists_{channel_id}", out)
     except Exception as ex:
-        print(f"[WARN] playlists fail {channel_id}: {ex}", flush=True)
+        log.warning(f"[WARN] playlists fail {channel_id}: {ex}")
         return []
 
 def collect_channel_videos(channel_id: str) -> List[Dict]:
+    cached = _cache_get(f"videos_{channel_id}", CACHE_TTL_LISTS)
+    if cached is not None:
+        log.info(f"[LIST] shorts(candidates) {channel_id}: {len(cached)} items (cached)")
+        return cached
+
     url = f"https://www.youtube.com/channel/{channel_id}/videos"
-    print(f"[LIST] shorts(candidates) {channel_id} …", flush=True)
+    log.info(f"[LIST] shorts(candidates) {channel_id} …")
     try:
-        j = _run_json([
-            "yt-dlp", "--flat-playlist", "-J",
-            "--playlist-end", str(MAX_ITEMS_PER_LIST),
-            url
-        ])
+        j = _extract(url, extract_flat=True, playlist_items=f"1:{MAX_ITEMS_PER_LIST}")
+        _harvest_avatar(channel_id, j)
         out: List[Dict] = []
+        append = out.append  # hoisted out of the per-entry loop
         for e in (j.get("entries") or []):
-            eid = (e or {}).get("id") or ""
+            if not e:
+                continue
+            eid = e.get("id") or ""
             if not eid:
                 continue
-            title = (e or {}).get("title") or ""
-            thumb = _pick_thumb_from_list((e or {}).get("thumbnails"))
-            out.append({
+            title = e.get("title") or ""
+            append({
                 "id": eid,
                 "title": title,
-                "url": f"https://www.youtube.com/watch?v={eid}",
-                "thumbnail": thumb,
+                "url": WATCH_URL_PREFIX + eid,
+                "thumbnail": VIDEO_THUMB_PREFIX + eid + VIDEO_THUMB_SUFFIX,
                 "type": "youtube_video",
                 "categories": [],
                 "lang": None
             })
-        print(f"[LIST] shorts(candidates) {channel_id}: {len(out)} items", flush=True)
-        return out
+        log.info(f"[LIST] shorts(candidates) {channel_id}: {len(out)} items")
+        return _cache_put(f"videos_{channel_id}", out)
     except Exception as ex:
-        print(f"[WARN] shorts fail {channel_id}: {ex}", flush=True)
+        log.warning(f"[WARN] shorts fail {channel_id}: {ex}")
         return []
 
 # ---------- Playlist meta (oEmbed first, yt-dlp fallback) ----------
 
+_OEMBED_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/125.0 Safari/537.36",
+}
+
+def _yt_request(method: str, path: str, timeout_sec: int,
+                body: Optional[bytes] = None, headers: Optional[Dict] = None):
+    """
+    Request against www.youtube.com over a keep-alive connection reused
+    per thread, so TCP+TLS setup is paid once instead of per call. A
+    stale connection is dropped and the request retried once.
+    """
+    for retry in (False, True):
+        conn = getattr(_tls, "yt_conn", None)
+        if conn is None:
+            conn = _tls.yt_conn = http.client.HTTPSConnection(
+                "www.youtube.com", timeout=timeout_sec
+            )
+        try:
+            conn.request(method, path, body=body,
+                         headers={**_OEMBED_HEADERS, **(headers or {})})
+            resp = conn.getresponse()
+            return resp.status, resp.read(), dict(resp.getheaders())
+        except Exception:
+            conn.close()
+            _tls.yt_conn = None
+            if retry:
+                raise
+
 def _oembed_playlist(pl_id: str, timeout_sec: int = 12) -> Optional[Dict]:
     """Fetch title + thumbnail via YouTube's oEmbed (no cookies needed)."""
-    url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/playlist?list={pl_id}&format=json"
-    req = urllib.request.Request(
-        url,
-        headers={
-            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-                          "(KHTML, like Gecko) Chrome/125.0 Safari/537.36"
-        },
-    )
+    path = f"/oembed?url=https://www.youtube.com/playlist?list={pl_id}&format=json"
     try:
-        with urllib.request.urlopen(req, timeout=timeout_sec) as r:
-            data = json.loads(r.read().decode("utf-8"))
+        status, body, resp_headers = _yt_request("GET", path, timeout_sec)
+        if status == 429:
+            # rate-limited: honor Retry-After (bounded) and try once more
+            try:
+                delay = float(resp_headers.get("Retry-After", 1))
+            except ValueError:
+                delay = 1.0
+            time.sleep(min(delay, 10.0) + random.uniform(0, 0.5))
+            status, body, resp_headers = _yt_request("GET", path, timeout_sec)
+        if status != 200:
+            log.info(f"[OEMBED] {pl_id} HTTP {status}")
+            return None
+        data = json.loads(body.decode("utf-8"))
         title = (data.get("title") or "").strip()
         thumb = data.get("thumbnail_url")
         if thumb:
@@ -197,36 +487,19 @@ def _oembed_playlist(pl_id: str, timeout_sec: int = 12) -> Optional[Dict]:
                 "playlistId": pl_id,
                 "title": title,
                 "thumbnail": thumb,
-                "generatedAt": datetime.utcnow().isoformat() + "Z",
+                "generatedAt": _now_z(),
                 "source": "oembed",
             }
         return None
-    except urllib.error.HTTPError as e:
-        print(f"[OEMBED] {pl_id} HTTP {e.code}")
-        return None
     except Exception as ex:
-        print(f"[OEMBED] {pl_id} failed: {ex}")
+        log.info(f"[OEMBED] {pl_id} failed: {ex}")
         return None
 
-def fetch_playlist_meta(pl_id: str, retries: int = 1, timeout_sec: int = 40) -> Optional[Dict]:
-    """
-    Try oEmbed first (works headlessly). If that fails, *then* try yt-dlp -J.
-    """
-    meta = _oembed_playlist(pl_id)
-    if meta:
-        print(f"[META] {pl_id} via oEmbed")
-        return meta
-
-    url = f"https://www.youtube.com/playlist?list={pl_id}"
+def _fetch_playlist_meta_ytdlp(pl_id: str, retries: int = 1, timeout_sec: int = 40) -> Optional[Dict]:
+    url = PLAYLIST_URL_PREFIX + pl_id
     for attempt in range(1, retries + 1):
         try:
-            p = subprocess.run(
-                ["yt-dlp", "-J", "--no-warnings", "--no-call-home", url],
-                text=True, capture_output=True, timeout=timeout_sec
-            )
-            if p.returncode != 0:
-                raise RuntimeError(p.stderr.strip() or p.stdout.strip())
-            j = json.loads(p.stdout)
+            j = _extract(url, socket_timeout=timeout_sec)
 
             title = (j.get("title") or "").strip()
             thumb = _pick_thumb_from_list(j.get("thumbnails"))
@@ -237,152 +510,400 @@ def fetch_playlist_meta(pl_id: str, retries: int = 1, timeout_sec: int = 40) ->
             if not thumb:
                 return None
 
-            return {
+            return _cache_put(f"meta_{pl_id}", {
                 "playlistId": pl_id,
                 "title": title,
                 "thumbnail": thumb,
-                "generatedAt": datetime.utcnow().isoformat() + "Z",
+                "generatedAt": _now_z(),
                 "source": "yt-dlp",
-            }
+            })
         except Exception as ex:
-            print(f"[WARN] fetch_playlist_meta {pl_id} (attempt {attempt}) failed: {ex}")
+            log.warning(f"[WARN] fetch_playlist_meta {pl_id} (attempt {attempt}) failed: {ex}")
             if attempt < retries:
-                time.sleep(3)
+                # exponential backoff with jitter so parallel retries
+                # don't hammer YouTube in lockstep
+                time.sleep(min(8.0, 0.5 * (2 ** attempt)) + random.random())
     return None
 
+def fetch_playlist_meta_batch(pl_ids: List[str]) -> Dict[str, Optional[Dict]]:
+    """
+    Resolve meta for all playlists in one pass instead of interleaving
+    per-playlist: cache hits first, then an oEmbed sweep, then a single
+    yt-dlp pass (shared extractor) over whatever is still missing.
+    """
+    metas: Dict[str, Optional[Dict]] = {}
+    to_probe: List[str] = []
+    for pl in pl_ids:
+        cached = _cache_get(f"meta_{pl}", CACHE_TTL_META)
+        if cached:
+            log.info(f"[META] {pl} cached")
+            metas[pl] = cached
+        else:
+            to_probe.append(pl)
+
+    # oEmbed calls are independent single GETs, so overlap their RTTs;
+    # each worker thread keeps its own keep-alive connection.
+    to_fallback: List[str] = []
+    if to_probe:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(to_probe))) as ex:
+            for pl, meta in zip(to_probe, ex.map(_oembed_playlist, to_probe)):
+                if meta:
+                    log.info(f"[META] {pl} via oEmbed")
+                    metas[pl] = _cache_put(f"meta_{pl}", meta)
+                else:
+                    to_fallback.append(pl)
+
+    if FAST_META and to_fallback:
+        log.info(f"[META] skipping yt-dlp fallback for {len(to_fallback)} playlist(s) (FAST_META)")
+        to_fallback = []
+
+    for pl in to_fallback:
+        metas[pl] = _fetch_playlist_meta_ytdlp(pl)
+
+    return metas
+
 # ---------- NEW: dump playlist_items for each playlist ----------
 
+def _dig(obj, *path):
+    """Walk nested dicts/lists, returning None on any missing step."""
+    for step in path:
+        try:
+            obj = obj[step]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return obj
+
+def _innertube_playlist_items(pl_id: str, max_items: int) -> Optional[List[Dict]]:
+    """
+    Enumerate playlist videos with a single InnerTube browse POST — the
+    endpoint yt-dlp itself drives — skipping the whole extractor
+    pipeline. Returns None when the response shape doesn't match or the
+    first page is truncated, so the caller falls back to yt-dlp.
+    """
+    payload = json.dumps({
+        "context": {"client": {"clientName": "WEB", "clientVersion": "2.20240101.00.00"}},
+        "browseId": "VL" + pl_id,
+    }).encode("utf-8")
+    try:
+        status, body, _ = _yt_request(
+            "POST", "/youtubei/v1/browse?prettyPrint=false", TIMEOUT_SEC,
+            body=payload, headers={"Content-Type": "application/json"},
+        )
+        if status != 200:
+            return None
+        data = json.loads(body)
+    except Exception as ex:
+        log.info(f"[ITEMS] innertube {pl_id} failed: {ex}")
+        return None
+
+    contents = _dig(
+        data, "contents", "twoColumnBrowseResultsRenderer", "tabs", 0,
+        "tabRenderer", "content", "sectionListRenderer", "contents", 0,
+        "itemSectionRenderer", "contents", 0,
+        "playlistVideoListRenderer", "contents",
+    )
+    if not isinstance(contents, list):
+        return None
+
+    out: List[Dict] = []
+    truncated = False
+    for c in contents:
+        if not isinstance(c, dict):
+            continue
+        if "continuationItemRenderer" in c:
+            truncated = True
+            continue
+        r = c.get("playlistVideoRenderer")
+        if not r:
+            continue
+        vid = r.get("videoId") or ""
+        if not vid:
+            continue
+        out.append({
+            "id": vid,
+            "title": _dig(r, "title", "runs", 0, "text") or "",
+            "url": WATCH_URL_PREFIX + vid,
+            "thumbnail": VIDEO_THUMB_PREFIX + vid + VIDEO_THUMB_SUFFIX,
+            "type": "youtube_video",
+            "categories": [],
+            "lang": None
+        })
+        if len(out) >= max_items:
+            return out
+    # The first page covered the playlist fully only if there is no
+    # continuation left; otherwise let yt-dlp page through.
+    return None if truncated else (out or None)
+
 def collect_playlist_items(pl_id: str, max_items: int = MAX_ITEMS_PER_PLAYLIST) -> List[Dict]:
     """
     Dump all videos in PL… playlist as a flat list (no official API).
     """
-    url = f"https://www.youtube.com/playlist?list={pl_id}"
-    print(f"[ITEMS] playlist {pl_id} …", flush=True)
+    cached = _cache_get(f"items_{pl_id}", CACHE_TTL_ITEMS)
+    if cached is not None:
+        log.info(f"[ITEMS] playlist {pl_id}: {len(cached)} items (cached)")
+        return cached
+
+    fast = _innertube_playlist_items(pl_id, max_items)
+    if fast is not None:
+        log.info(f"[ITEMS] playlist {pl_id}: {len(fast)} items (innertube)")
+        return _cache_put(f"items_{pl_id}", fast)
+
+    url = PLAYLIST_URL_PREFIX + pl_id
+    log.info(f"[ITEMS] playlist {pl_id} …")
     try:
-        j = _run_json([
-            "yt-dlp", "--flat-playlist", "-J",
-            "--playlist-end", str(max_items),
-            url
-        ])
+        j = _extract(url, extract_flat=True, playlist_items=f"1:{max_items}")
         out: List[Dict] = []
         for e in (j.get("entries") or []):
-            vid = (e or {}).get("id") or ""
+            if not e:
+                continue
+            vid = e.get("id") or ""
             if not vid:
                 continue
-            title = (e or {}).get("title") or ""
-            thumb = _pick_thumb_from_list((e or {}).get("thumbnails"))
+            title = e.get("title") or ""
             out.append({
                 "id": vid,
                 "title": title,
-                "url": f"https://www.youtube.com/watch?v={vid}",
-                "thumbnail": thumb,
+                "url": WATCH_URL_PREFIX + vid,
+                "thumbnail": VIDEO_THUMB_PREFIX + vid + VIDEO_THUMB_SUFFIX,
                 "type": "youtube_video",
                 "categories": [],
                 "lang": None
             })
-        print(f"[ITEMS] playlist {pl_id}: {len(out)} items", flush=True)
-        return out
+        log.info(f"[ITEMS] playlist {pl_id}: {len(out)} items")
+        return _cache_put(f"items_{pl_id}", out)
     except Exception as ex:
-        print(f"[WARN] items fail {pl_id}: {ex}", flush=True)
+        log.warning(f"[WARN] items fail {pl_id}: {ex}")
         return []
 
 # ---------- Main ----------
 
-def main() -> None:
-    ensure_dirs()
-    items = load_videos()
+# Fetchers hand finished payloads to a single writer thread through a
+# bounded queue, so disk writes overlap the remaining network fetches
+# and all filesystem traffic stays serialized in one place.
+_write_q: "queue.Queue" = queue.Queue(maxsize=32)
 
-    ch_for_playlists = sorted({
-        it.get("channelId") for it in items
-        if it.get("type") == "youtube_channel_playlists" and it.get("channelId")
-    })
-    ch_for_shorts = sorted({
-        it.get("channelId") for it in items
-        if it.get("type") == "youtube_channel_shorts" and it.get("channelId")
-    })
+# Actual writes (content-skips excluded); only the writer thread mutates it.
+_files_written = 0
 
-    print(f"[INFO] Channels for playlists: {ch_for_playlists}")
-    print(f"[INFO] Channels for shorts   : {ch_for_shorts}")
+def _enqueue_write(path: Path, obj: Dict, note: str, atomic: bool = True) -> None:
+    _write_q.put((path, obj, note, atomic))
 
+def _writer_loop() -> None:
+    global _files_written
+    while True:
+        item = _write_q.get()
+        try:
+            if item is None:
+                return
+            path, obj, note, atomic = item
+            try:
+                if write_json(path, obj, atomic=atomic):
+                    log.info(note)
+                    _files_written += 1
+            except Exception as ex:
+                log.warning(f"[WARN] write {path} failed: {ex}")
+        finally:
+            _write_q.task_done()
+
+# A playlist can show up both in a channel's /playlists page and as a
+# youtube_playlist entry in videos.json; dump its items only once per run.
+_items_done_lock = threading.Lock()
+_items_done: set = set()
+
+def _dump_playlist_items(pl_id: str, now: str) -> int:
+    with _items_done_lock:
+        if pl_id in _items_done:
+            log.info(f"[ITEMS] playlist {pl_id} already dumped this run")
+            return 0
+        _items_done.add(pl_id)
+
+    items_list = collect_playlist_items(pl_id)
+    pi_path = PLAYLIST_ITEMS_DIR / f"{pl_id}.json"
+    _enqueue_write(pi_path, {
+        "playlistId": pl_id,
+        "generatedAt": now,
+        "items": items_list
+    }, f"[OK] wrote {pi_path} ({len(items_list)} items)", atomic=False)
+    return 1
+
+def _prune_stale(dirpath: Path, keep: set) -> None:
+    """
+    Drop outputs whose channel is no longer in videos.json. Everything
+    still listed was rewritten (or content-skipped) this run, so this is
+    the only cleanup needed — no blanket clean-and-rewrite churn.
+    """
+    for p in dirpath.glob("*.json"):
+        if p.stem not in keep:
+            try:
+                p.unlink()
+                log.info(f"[PRUNE] removed stale {p}")
+            except OSError as ex:
+                log.warning(f"[WARN] prune {p} failed: {ex}")
+
+def _process_channel(kind: str, ch: str, now: str) -> int:
+    """
+    Full pipeline for one channel: avatar + listing + JSON outputs.
+    kind is "playlists" or "shorts". Returns the number of outputs
+    produced (the writer may still skip unchanged ones on disk).
+    """
     written = 0
-
-    # --- Channels → playlists + playlist_items
-    for ch in ch_for_playlists:
-        avatar = fetch_channel_avatar(ch)
+    # The listing runs first on purpose: cold listings stash the avatar
+    # they carry (_harvest_avatar), so the fetch_channel_avatar call
+    # after it is normally a cache hit rather than its own extraction.
+    if kind == "playlists":
         playlists = collect_playlists(ch)
+        avatar = fetch_channel_avatar(ch)
 
         # 1) channel playlists JSON
         path = PLAYLISTS_DIR / f"{ch}.json"
-        write_json(path, {
+        _enqueue_write(path, {
             "channelId": ch,
             "channelAvatar": avatar,
-            "generatedAt": datetime.utcnow().isoformat() + "Z",
+            "generatedAt": now,
             "items": playlists
-        })
-        print(f"[OK] wrote {path} ({len(playlists)} items)", flush=True)
+        }, f"[OK] wrote {path} ({len(playlists)} items)")
         written += 1
 
         # 2) playlist_items for every playlist in that channel
         for p in playlists:
-            pl_id = (p or {}).get("id") or ""
+            pl_id = p.get("id") if p else ""
             if not pl_id:
                 continue
-            items_list = collect_playlist_items(pl_id)
-            pi_path = PLAYLIST_ITEMS_DIR / f"{pl_id}.json"
-            write_json(pi_path, {
-                "playlistId": pl_id,
-                "generatedAt": datetime.utcnow().isoformat() + "Z",
-                "items": items_list
-            })
-            print(f"[OK] wrote {pi_path} ({len(items_list)} items)", flush=True)
-            written += 1
-
-    # --- Channels → shorts (video candidates)
-    for ch in ch_for_shorts:
-        avatar = fetch_channel_avatar(ch)
+            written += _dump_playlist_items(pl_id, now)
+    else:
         vids = collect_channel_videos(ch)
+        avatar = fetch_channel_avatar(ch)
         path = SHORTS_DIR / f"{ch}.json"
-        write_json(path, {
+        _enqueue_write(path, {
             "channelId": ch,
             "channelAvatar": avatar,
-            "generatedAt": datetime.utcnow().isoformat() + "Z",
+            "generatedAt": now,
             "items": vids
-        })
-        print(f"[OK] wrote {path} ({len(vids)} items)", flush=True)
+        }, f"[OK] wrote {path} ({len(vids)} items)")
         written += 1
 
-    # --- Playlists declared directly in videos.json
-    pl_ids = [it["id"] for it in items if it.get("type") == "youtube_playlist" and it.get("id")]
-    if pl_ids:
-        print(f"[INFO] Playlists declared in videos.json: {pl_ids}")
+    return written
 
-    for pl in pl_ids:
-        # meta
-        meta = fetch_playlist_meta(pl)
-        if meta:
-            path = PLAYLIST_META_DIR / f"{pl}.json"
-            write_json(path, meta)
-            print(f"[OK] wrote {path}", flush=True)
-            written += 1
-        else:
-            print(f"[WARN] no meta for {pl}", flush=True)
-
-        # items
-        items_list = collect_playlist_items(pl)
-        pi_path = PLAYLIST_ITEMS_DIR / f"{pl}.json"
-        write_json(pi_path, {
-            "playlistId": pl,
-            "generatedAt": datetime.utcnow().isoformat() + "Z",
-            "items": items_list
-        })
-        print(f"[OK] wrote {pi_path} ({len(items_list)} items)", flush=True)
+def _process_playlist(pl: str, meta: Optional[Dict], now: str) -> int:
+    """Meta + items for one playlist declared directly in videos.json."""
+    written = 0
+
+    if meta:
+        path = PLAYLIST_META_DIR / f"{pl}.json"
+        _enqueue_write(path, meta, f"[OK] wrote {path}")
         written += 1
+    else:
+        log.warning(f"[WARN] no meta for {pl}")
+
+    written += _dump_playlist_items(pl, now)
+
+    return written
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Generate catalog JSON from videos.json (no official API).")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="ignore the .cache/catalog layer and refetch everything")
+    ap.add_argument("--refresh", action="append", default=[], metavar="ID",
+                    help="evict cached entries for this channel/playlist id (repeatable)")
+    ap.add_argument("--compact", action="store_true",
+                    help="emit compact JSON instead of indent=2 (≈half the bytes)")
+    args = ap.parse_args(argv)
+
+    listener = _setup_logging()
+
+    global _cache_disabled, _compact
+    _cache_disabled = args.no_cache
+    _compact = args.compact
+    for entry_id in args.refresh:
+        _cache_evict(entry_id)
+
+    try:
+        _run(args)
+    finally:
+        listener.stop()
 
-    if written == 0:
-        print("[ERROR] Nothing written. Check videos.json channelId/type fields.", file=sys.stderr)
+def _run(args) -> None:
+    ensure_dirs()
+    items = load_videos()
+
+    # Single pass over items instead of one scan per category.
+    ch_pl, ch_sh = set(), set()
+    pl_ids: List[str] = []
+    for it in items:
+        t = it.get("type")
+        if t == "youtube_channel_playlists" and it.get("channelId"):
+            ch_pl.add(it["channelId"])
+        elif t == "youtube_channel_shorts" and it.get("channelId"):
+            ch_sh.add(it["channelId"])
+        elif t == "youtube_playlist":
+            pl_id = _extract_pl_id(it)
+            if pl_id:
+                pl_ids.append(pl_id)
+    ch_for_playlists = sorted(ch_pl)
+    ch_for_shorts = sorted(ch_sh)
+
+    log.info(f"[INFO] Channels for playlists: {ch_for_playlists}")
+    log.info(f"[INFO] Channels for shorts   : {ch_for_shorts}")
+    if pl_ids:
+        log.info(f"[INFO] Playlists declared in videos.json: {pl_ids}")
+
+    # Everything below blocks on network I/O (yt-dlp extractions / HTTP),
+    # so run all channels and playlists concurrently in a small thread pool.
+    tasks = (
+        [("playlists", ch) for ch in ch_for_playlists]
+        + [("shorts", ch) for ch in ch_for_shorts]
+        + [("playlist", pl) for pl in pl_ids]
+    )
+
+    # One timestamp for the whole run: cheaper than a datetime per file
+    # and it keeps outputs byte-identical within a run, which lets the
+    # unchanged-content skip in write_json do its job.
+    now = _now_z()
+
+    # One batch call for all declared-playlist metas; the per-playlist
+    # workers then only have the items dump left to do.
+    metas = fetch_playlist_meta_batch(pl_ids) if pl_ids else {}
+
+    writer = threading.Thread(target=_writer_loop, name="writer", daemon=True)
+    writer.start()
+
+    produced = 0
+    if tasks:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(tasks))) as ex:
+            futures = {}
+            for kind, arg in tasks:
+                if kind == "playlist":
+                    fut = ex.submit(_process_playlist, arg, metas.get(arg), now)
+                else:
+                    fut = ex.submit(_process_channel, kind, arg, now)
+                futures[fut] = (kind, arg)
+            for fut in as_completed(futures):
+                kind, arg = futures[fut]
+                try:
+                    produced += fut.result()
+                except Exception as ex_err:
+                    log.warning(f"[WARN] task {kind}:{arg} failed: {ex_err}")
+
+    # drain outstanding writes, then stop the writer
+    _write_q.join()
+    _write_q.put(None)
+    writer.join()
+    if _encode_pool is not None:
+        _encode_pool.shutdown()
+
+    # produced counts outputs the tasks yielded; _files_written is what
+    # actually changed on disk (a fully warm run legitimately writes 0).
+    if produced == 0:
+        log.error("[ERROR] Nothing written. Check videos.json channelId/type fields.")
         sys.exit(2)
 
-    print(f"[DONE] Generated/updated {written} file(s).")
+    # Prune only after the sanity check: a bad/empty videos.json must not
+    # wipe the published outputs on its way to exit(2).
+    _prune_stale(PLAYLISTS_DIR, ch_pl)
+    _prune_stale(SHORTS_DIR, ch_sh)
+
+    log.info(f"[DONE] Generated/updated {_files_written} file(s), "
+             f"{produced - _files_written} unchanged.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file